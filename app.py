@@ -154,6 +154,15 @@ selected_movie = st.selectbox(
 # Number of recommendations slider
 num_recommendations = st.slider("Number of recommendations:", min_value=5, max_value=20, value=10)
 
+# Diversity slider, 0 keeps the plain similarity ranking and 1 maps to an
+# MMR lambda of 0.5 so relevance always weighs at least as much as diversity
+# Disabled when no item centroids were built for this deployment
+diversity = st.slider(
+    "Diversity:", min_value=0.0, max_value=1.0, value=0.0, step=0.1,
+    disabled=not recommender.supports_diversity,
+    help=None if recommender.supports_diversity else "Unavailable: item centroids have not been built for this deployment.",
+)
+
 # Add a search button
 search_button = st.button("Get Recommendations", type="primary", disabled=not selected_movie)
 
@@ -241,7 +250,8 @@ if search_button and selected_movie:
         # Recommendations section
         st.markdown("<h2 style='color: #2D3748; font-size: 1.5rem; font-weight: 500; margin-bottom: 1rem; margin-top: 2rem;'>Recommended Movies Based on Your Selection</h2>", unsafe_allow_html=True)
         with st.spinner('Finding recommendations...'):
-            recommendations = recommender.recommend(selected_movie, top_k=num_recommendations)
+            mmr_lambda = 1 - diversity / 2 if diversity > 0 and recommender.supports_diversity else None
+            recommendations = recommender.recommend(selected_movie, top_k=num_recommendations, mmr_lambda=mmr_lambda)
             
             # Create four columns for displaying recommendations in wide mode
             cols = st.columns(4)
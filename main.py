@@ -1,23 +1,60 @@
 import sqlite3
+import logging
 import numpy as np
 import os
 from dotenv import load_dotenv
 from utils.utils import create_embeddings, query_embedding
+from utils.rerank import check_lambda, item_centroid_table, mmr_rerank
+from utils.vector_bundle import load_local_index
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Pinecone namespace the app serves recommendations from
+DEFAULT_NAMESPACE = "namespace_until_1990"
+
+# candidates fetched per requested result when re-ranking for diversity
+MMR_OVERFETCH = 5
+
 class movie_recommender:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, query_fn=None, namespace=DEFAULT_NAMESPACE):
         if db_path is None:
             db_path = os.getenv('SQLITE_DB_PATH', 'data/movies.db')
         self.db_path = db_path
         self.create_embeddings = create_embeddings
-        self.query_embedding = query_embedding
+        self.query_embedding = query_fn if query_fn is not None else query_embedding
+        self.namespace = namespace
+        self.local_index = None
 
         # Verify database exists
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database not found at {self.db_path}. Run utils/migrate_to_sqlite.py first.")
 
+        # Serve from a local vector bundle instead of querying Pinecone
+        # unless a query function was passed in explicitly
+        bundle_path = os.getenv('VECTOR_BUNDLE_PATH')
+        if bundle_path and query_fn is None:
+            self.local_index = load_local_index(bundle_path, mode=os.getenv('LOCAL_SEARCH_MODE', 'exact'))
+            self.query_embedding = self.local_index.query
+
+        # Per-item centroids for diversity re-ranking, loaded once up front
+        self.item_centroids = self._load_item_centroids()
+
+    @property
+    def supports_diversity(self):
+        """Whether recommend() can re-rank with mmr_lambda."""
+        return self.item_centroids is not None
+
+    def _load_item_centroids(self):
+        """Load the saved centroid table, or build it from the local bundle."""
+        path = os.getenv('ITEM_CENTROIDS_PATH', 'data/item_centroids.npz')
+        if os.path.exists(path):
+            return item_centroid_table.load(path)
+        if self.local_index is not None:
+            return item_centroid_table(*self.local_index.item_centroids()[:2])
+        return None
+
     def _get_connection(self):
         """Get a database connection."""
         return sqlite3.connect(self.db_path)
@@ -39,7 +76,7 @@ class movie_recommender:
         conn.close()
         return texts
 
-    def recommend(self, film_name, top_k=10):
+    def recommend(self, film_name, top_k=10, mmr_lambda=None):
         # Get all text entries for the movie from database
         film_list = self.get_movie_texts(film_name)
 
@@ -49,15 +86,30 @@ class movie_recommender:
         # now we create embeddings for these reviews
         film_list_embeddings = self.create_embeddings(film_list)
 
+        return self.recommend_from_embeddings(film_name, film_list_embeddings, top_k=top_k, mmr_lambda=mmr_lambda)
+
+    def recommend_from_embeddings(self, film_name, film_list_embeddings, top_k=10, mmr_lambda=None):
+        """Recommend films similar to the given review embeddings of film_name.
+
+        If mmr_lambda is set, an over-fetched candidate set is re-ranked with
+        maximal marginal relevance to avoid near-duplicate recommendations.
+        """
         # mean the vectors
         film_list_embeddings = np.array(film_list_embeddings)
         film_list_embeddings_mean = np.mean(film_list_embeddings, axis=0).reshape(1,-1)
         film_list_embeddings_mean_list = film_list_embeddings_mean.flatten().tolist()
 
+        if mmr_lambda is not None:
+            check_lambda(mmr_lambda)
+            if self.supports_diversity:
+                return self._recommend_diverse(film_name, film_list_embeddings_mean_list, top_k, mmr_lambda)
+            logger.warning("No item centroids available, returning the plain similarity ranking. "
+                           "Run utils/build_item_centroids.py to enable diversity re-ranking.")
+
         # Request more results to account for duplicate titles
         # Multiply by 3 to ensure we get enough unique movies after deduplication
         query_top_k = top_k * 3
-        sugestions = self.query_embedding(film_list_embeddings_mean_list, top_k=query_top_k, namespace="namespace_until_1990", movie_name=film_name)
+        sugestions = self.query_embedding(film_list_embeddings_mean_list, top_k=query_top_k, namespace=self.namespace, movie_name=film_name)
 
         recommendations = []
         for match in sugestions.matches:
@@ -77,6 +129,25 @@ class movie_recommender:
 
         return recommendations
 
+    def _recommend_diverse(self, film_name, query_vector, top_k, mmr_lambda):
+        """Re-rank an over-fetched candidate set with maximal marginal relevance."""
+        sugestions = self.query_embedding(query_vector, top_k=top_k * MMR_OVERFETCH, namespace=self.namespace, movie_name=film_name)
+
+        # best match per candidate title, compared through its precomputed item centroid
+        best_matches, centroids = self.item_centroids.lookup(sugestions.matches)
+        relevance = [match.score for match in best_matches]
+        order = mmr_rerank(relevance, centroids, top_k, lambda_mult=mmr_lambda)
+
+        recommendations = []
+        for i in order:
+            match = best_matches[i]
+            imdb_id = match.metadata.get('imdb_id')
+            if imdb_id:
+                imdb_id = str(int(imdb_id)).zfill(7)
+            recommendations.append((match.metadata.get('title'), match.score, imdb_id, match.metadata.get('item_id')))
+
+        return recommendations
+
 
 
 
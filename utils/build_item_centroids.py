@@ -0,0 +1,46 @@
+"""
+Precompute one centroid vector per item for diversity re-ranking.
+
+This script:
+1. Loads every review vector, from the bundle at VECTOR_BUNDLE_PATH if set,
+   otherwise from the Pinecone namespace
+2. Averages the review vectors of each item into a centroid
+3. Saves the centroids to ITEM_CENTROIDS_PATH for movie_recommender to load
+
+Run from the repository root:
+    python -m utils.build_item_centroids
+"""
+
+import os
+from dotenv import load_dotenv
+
+from utils.local_search import fetch_namespace_vectors, local_index
+from utils.rerank import item_centroid_table
+from utils.vector_bundle import load_local_index
+
+load_dotenv()
+
+
+def main():
+    bundle_path = os.getenv('VECTOR_BUNDLE_PATH')
+    namespace = os.getenv('NAMESPACE', 'namespace_until_1990')
+    output_path = os.getenv('ITEM_CENTROIDS_PATH', 'data/item_centroids.npz')
+
+    if bundle_path:
+        print(f"Loading vectors from bundle {bundle_path}...")
+        index = load_local_index(bundle_path)
+    else:
+        # imported here so building from a bundle needs no API keys
+        from utils.utils import index as pinecone_index
+        print(f"Downloading vectors from namespace '{namespace}'...")
+        index = local_index(*fetch_namespace_vectors(pinecone_index, namespace))
+    print(f"✓ Loaded {len(index)} vectors")
+
+    ids, centroids, _ = index.item_centroids()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    item_centroid_table(ids, centroids).save(output_path)
+    print(f"✓ Saved {len(ids)} item centroids to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Recall/latency evaluation of search backends and query aggregation strategies.
+
+This script:
+1. Downloads every stored review vector from the Pinecone namespace
+2. Samples query films and uses their stored review vectors as query embeddings
+   (so the embedding API is never called)
+3. Computes exact ground-truth neighbours with brute-force cosine search
+4. Runs every backend (pinecone, exact, ann, quantized) with every aggregation
+   mode (mean, max, per_item) and measures recall@k, overlap with the current
+   production output, latency and memory
+5. Writes a JSON report and exits non-zero if a configuration falls below the
+   --min-recall / --min-overlap gates
+
+Run from the repository root:
+    python -m utils.evaluate_search --queries 50 --top-k 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+
+from main import DEFAULT_NAMESPACE, movie_recommender
+from utils.local_search import SEARCH_MODES, fetch_namespace_vectors, local_index, normalize
+from utils.utils import index, query_embedding
+
+load_dotenv()
+
+BACKENDS = ("pinecone",) + SEARCH_MODES
+AGGREGATIONS = ("mean", "max", "per_item")
+
+# same over-fetch factor recommend() uses before removing duplicate titles
+OVERFETCH = 3
+
+QUANTIZED_NOTE = (
+    "NumPy has no int8 matrix multiply, so each query copies int8 code chunks into a "
+    "float32 buffer before scoring; latency includes that cast and is an upper bound "
+    "for a native int8 kernel"
+)
+
+
+def unique_titles(matches, top_k):
+    """Titles of the matches in rank order, duplicates removed, as recommend() does."""
+    titles = []
+    for match in matches:
+        title = match.metadata.get("title")
+        if title and title not in titles:
+            titles.append(title)
+            if len(titles) >= top_k:
+                break
+    return titles
+
+
+def rank_titles(query_fn, aggregation, review_vectors, film_name, top_k, namespace):
+    """Rank recommended titles for one film with the given backend query function."""
+    if aggregation == "max":
+        # query with every review separately and keep the best score per title
+        best = {}
+        for vector in review_vectors:
+            response = query_fn(vector.tolist(), top_k=top_k * OVERFETCH, namespace=namespace, movie_name=film_name)
+            for match in response.matches:
+                title = match.metadata.get("title")
+                if title and match.score > best.get(title, -np.inf):
+                    best[title] = match.score
+        return sorted(best, key=best.get, reverse=True)[:top_k]
+
+    # mean and per_item both query with the mean review vector, per_item
+    # searches an index of item centroids instead of individual reviews
+    mean_vector = np.mean(review_vectors, axis=0).tolist()
+    response = query_fn(mean_vector, top_k=top_k * OVERFETCH, namespace=namespace, movie_name=film_name)
+    return unique_titles(response.matches, top_k)
+
+
+def overlap(result, reference):
+    """Fraction of the reference titles that also appear in the result."""
+    if not reference:
+        return 1.0
+    return len(set(result) & set(reference)) / len(reference)
+
+
+def build_local_backends(ids, vectors, metadatas, modes, nprobe):
+    """Build each local search mode over reviews and over item centroids."""
+    backends = {}
+    item_ids, item_vectors, item_metadatas = None, None, None
+    # exact first so item centroids come from the unquantized vectors
+    for mode in sorted(modes, key=lambda m: m != "exact"):
+        start = time.perf_counter()
+        review_index = local_index(ids, vectors, metadatas, mode=mode, nprobe=nprobe)
+        review_seconds = time.perf_counter() - start
+
+        if item_ids is None:
+            item_ids, item_vectors, item_metadatas = review_index.item_centroids()
+        start = time.perf_counter()
+        item_index = local_index(item_ids, item_vectors, item_metadatas, mode=mode, nprobe=nprobe)
+        item_seconds = time.perf_counter() - start
+
+        backends[mode] = {
+            "review": review_index,
+            "item": item_index,
+            "build_seconds": {"review": review_seconds, "item": item_seconds},
+        }
+    return backends
+
+
+def evaluate(args):
+    namespace = args.namespace
+    print(f"Downloading vectors from namespace '{namespace}'...")
+    ids, vectors, metadatas = fetch_namespace_vectors(index, namespace)
+    vectors = normalize(vectors)
+    print(f"✓ Loaded {len(ids)} vectors of dimension {vectors.shape[1]}")
+
+    local_modes = [b for b in args.backends if b in SEARCH_MODES]
+    print("Building local indexes...")
+    local_backends = build_local_backends(ids, vectors, metadatas, set(local_modes) | {"exact"}, args.nprobe)
+    ground_truth_index = local_backends["exact"]
+
+    # sample query films that have stored review vectors
+    titles = np.array([m.get("title") for m in metadatas], dtype=object)
+    candidates = sorted({t for t in titles if t})
+    rng = np.random.default_rng(args.seed)
+    query_films = [str(t) for t in rng.choice(candidates, size=min(args.queries, len(candidates)), replace=False)]
+    print(f"✓ Sampled {len(query_films)} query films")
+
+    # pass the Pinecone query explicitly so VECTOR_BUNDLE_PATH is never loaded, and
+    # the evaluated namespace so production and ground truth search the same catalog
+    if namespace != DEFAULT_NAMESPACE:
+        print(f"Note: the app serves '{DEFAULT_NAMESPACE}', the production reference "
+              f"uses the same recommend() code on '{namespace}' instead")
+    recommender = movie_recommender(query_fn=query_embedding, namespace=namespace)
+    reviews = {film: vectors[titles == film] for film in query_films}
+    production = {
+        film: [t for t, _, _, _ in recommender.recommend_from_embeddings(film, reviews[film], top_k=args.top_k)]
+        for film in query_films
+    }
+
+    truths = {}
+    results = []
+    for backend in args.backends:
+        for aggregation in args.aggregations:
+            print(f"Evaluating backend={backend} aggregation={aggregation}...")
+            result = {"backend": backend, "aggregation": aggregation}
+            if backend == "pinecone" and aggregation == "per_item":
+                result["skipped"] = "Pinecone stores one vector per review, not per item"
+                results.append(result)
+                continue
+
+            level = "item" if aggregation == "per_item" else "review"
+            truth_fn = ground_truth_index[level].query
+            if backend == "pinecone":
+                query_fn = query_embedding
+            else:
+                query_fn = local_backends[backend][level].query
+
+            recalls, overlaps, latencies = [], [], []
+            for film in query_films:
+                key = (aggregation, film)
+                if key not in truths:
+                    truths[key] = rank_titles(truth_fn, aggregation, reviews[film], film, args.top_k, namespace)
+                truth = truths[key]
+                start = time.perf_counter()
+                ranked = rank_titles(query_fn, aggregation, reviews[film], film, args.top_k, namespace)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(overlap(ranked, truth))
+                overlaps.append(overlap(ranked, production[film]))
+
+            result.update({
+                "recall_at_k": float(np.mean(recalls)),
+                "overlap_with_production": float(np.mean(overlaps)),
+                "latency_ms": {
+                    "mean": float(np.mean(latencies)),
+                    "p50": float(np.percentile(latencies, 50)),
+                    "p95": float(np.percentile(latencies, 95)),
+                },
+            })
+
+            if backend != "pinecone":
+                # peak Python/NumPy allocations while answering a few queries
+                tracemalloc.start()
+                for film in query_films[:args.memory_queries]:
+                    rank_titles(query_fn, aggregation, reviews[film], film, args.top_k, namespace)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result["index_bytes"] = local_backends[backend][level].nbytes
+                result["build_seconds"] = local_backends[backend]["build_seconds"][level]
+                result["peak_query_bytes"] = peak
+                if backend == "quantized":
+                    result["note"] = QUANTIZED_NOTE
+
+            results.append(result)
+            print(f"  recall@{args.top_k}={result['recall_at_k']:.3f} "
+                  f"overlap={result['overlap_with_production']:.3f} "
+                  f"p50={result['latency_ms']['p50']:.2f}ms")
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "namespace": namespace,
+        "app_namespace": DEFAULT_NAMESPACE,
+        "num_vectors": len(ids),
+        "dimension": int(vectors.shape[1]),
+        "top_k": args.top_k,
+        "num_queries": len(query_films),
+        "ground_truth": "exact cosine search over the stored vectors, per aggregation mode",
+        "gates": {"min_recall": args.min_recall, "min_overlap": args.min_overlap},
+        "results": results,
+    }
+
+
+def check_gates(report):
+    """Return the evaluated configurations that fall below the quality gates."""
+    failures = []
+    for result in report["results"]:
+        if "skipped" in result:
+            continue
+        if result["recall_at_k"] < report["gates"]["min_recall"]:
+            failures.append(f"{result['backend']}/{result['aggregation']}: recall@k {result['recall_at_k']:.3f}")
+        if result["overlap_with_production"] < report["gates"]["min_overlap"]:
+            failures.append(f"{result['backend']}/{result['aggregation']}: overlap {result['overlap_with_production']:.3f}")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare search backends and aggregation strategies.")
+    parser.add_argument("--namespace", default=os.getenv("NAMESPACE", "namespace_until_1990"))
+    parser.add_argument("--queries", type=int, default=50, help="number of query films to sample")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--aggregations", nargs="+", choices=AGGREGATIONS, default=list(AGGREGATIONS))
+    parser.add_argument("--nprobe", type=int, default=8, help="clusters scanned by the ann backend")
+    parser.add_argument("--memory-queries", type=int, default=5, help="queries traced for peak memory")
+    parser.add_argument("--min-recall", type=float, default=0.0)
+    parser.add_argument("--min-overlap", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="reports/search_evaluation.json")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    report = evaluate(args)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to: {args.output}")
+
+    failures = check_gates(report)
+    if failures:
+        print("\nQuality gates failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
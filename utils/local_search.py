@@ -0,0 +1,241 @@
+"""
+In-memory vector search over the stored review embeddings.
+
+The vectors are pulled out of Pinecone once and kept as a float32 matrix so
+queries can be answered without a network round-trip. Three search modes are
+available:
+- exact: brute-force cosine similarity against every stored vector
+- ann: inverted-file (IVF) search that only scans the closest k-means clusters
+- quantized: brute-force search over int8 scalar-quantized vectors, the float
+  matrix is dropped and rows are dequantized on demand
+
+`local_index.query` has the same signature and response shape as
+`utils.utils.query_embedding`, so it can be dropped into `movie_recommender`.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+search_match = namedtuple("search_match", ["id", "score", "metadata"])
+search_response = namedtuple("search_response", ["matches"])
+
+SEARCH_MODES = ("exact", "ann", "quantized")
+
+# rows scored per matrix multiplication, keeps temporary arrays small
+CHUNK_ROWS = 16384
+# int8 rows cast to float32 per step in quantized mode, small so the cast buffer
+# stays a fraction of the codes
+QUANTIZED_CHUNK_ROWS = 1024
+# rows dequantized/copied per step when averaging item centroids
+CENTROID_CHUNK_ROWS = 4096
+
+
+def fetch_namespace_vectors(index, namespace, batch_size=100):
+    """Download every id, vector and metadata stored in a Pinecone namespace."""
+    ids, values, metadatas = [], [], []
+    for id_page in index.list(namespace=namespace):
+        for start in range(0, len(id_page), batch_size):
+            batch = id_page[start:start + batch_size]
+            response = index.fetch(ids=batch, namespace=namespace)
+            for vector_id in batch:
+                vector = response.vectors.get(vector_id)
+                if vector is None:
+                    continue
+                ids.append(vector_id)
+                values.append(vector.values)
+                metadatas.append(dict(vector.metadata or {}))
+    return ids, np.asarray(values, dtype=np.float32), metadatas
+
+
+def item_key(item_id):
+    """Lookup key for an item_id, Pinecone returns stored integers as floats."""
+    if isinstance(item_id, (int, float)) and float(item_id).is_integer():
+        return str(int(item_id))
+    return str(item_id)
+
+
+def normalize(vectors):
+    """Scale rows to unit length, returning the input untouched if they already are."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    if np.allclose(norms, 1.0, atol=1e-3):
+        return vectors
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def group_means(vectors, groups, num_groups):
+    """Average the rows of vectors that share a group number."""
+    order = np.argsort(groups, kind="stable")
+    counts = np.bincount(groups, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nonempty = np.flatnonzero(counts)
+    sums = np.zeros((num_groups, vectors.shape[1]), dtype=np.float32)
+    sums[nonempty] = np.add.reduceat(vectors[order], starts[nonempty], axis=0)
+    return sums / np.maximum(counts, 1)[:, None], counts
+
+
+def add_group_sums(sums, counts, vectors, groups):
+    """Add the rows of vectors into sums[group] and count them, in place."""
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    sums[sorted_groups[starts]] += np.add.reduceat(vectors[order], starts, axis=0)
+    counts += np.bincount(groups, minlength=len(counts))
+
+
+def top_k_rows(scores, top_k):
+    """Return (indices, scores) of the top_k columns of each row, best first."""
+    top_k = min(top_k, scores.shape[1])
+    if top_k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=np.float32)
+    indices = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    top_scores = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class local_index:
+    def __init__(self, ids, vectors, metadatas, mode="exact", nlist=None, nprobe=8, seed=0):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        self.ids = list(ids)
+        self.metadatas = list(metadatas)
+        self.titles = np.array([m.get("title") for m in self.metadatas], dtype=object)
+        self.vectors = normalize(vectors)
+        self.mode = mode
+        self.nprobe = nprobe
+
+        if mode == "ann":
+            self._build_ivf(nlist, seed)
+        elif mode == "quantized":
+            self._build_quantized()
+            self.vectors = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """Memory held by the structures this mode searches over."""
+        if self.mode == "quantized":
+            return self.codes.nbytes + self.scales.nbytes + self._chunk_buffer.nbytes
+        if self.mode == "ann":
+            return self.vectors.nbytes + self.centroids.nbytes + self.list_rows.nbytes + self.list_offsets.nbytes
+        return self.vectors.nbytes
+
+    def _assign(self, centroids):
+        """Closest centroid for every stored vector."""
+        assignment = np.empty(len(self.vectors), dtype=np.int64)
+        for start in range(0, len(self.vectors), CHUNK_ROWS):
+            chunk = self.vectors[start:start + CHUNK_ROWS]
+            assignment[start:start + CHUNK_ROWS] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignment
+
+    def _build_ivf(self, nlist, seed, iterations=10):
+        """Cluster the vectors with spherical k-means and keep one row list per cluster."""
+        num_vectors = len(self.vectors)
+        nlist = min(nlist or max(1, int(np.sqrt(num_vectors))), num_vectors)
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(num_vectors, nlist, replace=False)]
+
+        for _ in range(iterations):
+            assignment = self._assign(centroids)
+            means, counts = group_means(self.vectors, assignment, nlist)
+            # keep the previous centroid for clusters that lost all their members
+            means[counts == 0] = centroids[counts == 0]
+            centroids = normalize(means)
+
+        assignment = self._assign(centroids)
+        self.centroids = centroids
+        self.list_rows = np.argsort(assignment, kind="stable")
+        self.list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist))))
+
+    def _build_quantized(self):
+        """Store each vector as int8 codes plus one float scale per row."""
+        self.scales = np.maximum(np.abs(self.vectors).max(axis=1), 1e-12) / 127.0
+        self.codes = np.round(self.vectors / self.scales[:, None]).astype(np.int8)
+        self.scales = self.scales.astype(np.float32)
+        # reused float32 buffer for one chunk of codes, NumPy has no int8 matmul
+        self._chunk_buffer = np.empty((min(QUANTIZED_CHUNK_ROWS, len(self.codes)), self.codes.shape[1]), dtype=np.float32)
+
+    def dense_rows(self, rows):
+        """Float vectors of the given rows, dequantized in quantized mode."""
+        if self.mode == "quantized":
+            return self.codes[rows].astype(np.float32) * self.scales[rows, None]
+        return self.vectors[rows]
+
+    def _scores(self, queries):
+        """Similarity of every query against every stored vector."""
+        if self.mode == "exact":
+            return queries @ self.vectors.T
+        scores = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), QUANTIZED_CHUNK_ROWS):
+            end = start + QUANTIZED_CHUNK_ROWS
+            codes = self.codes[start:end]
+            buffer = self._chunk_buffer[:len(codes)]
+            np.copyto(buffer, codes)
+            scores[:, start:end] = (queries @ buffer.T) * self.scales[start:end]
+        return scores
+
+    def _search_ivf(self, queries, top_k, excluded):
+        """Score only the rows of the nprobe clusters closest to each query."""
+        indices = np.full((len(queries), top_k), -1, dtype=np.int64)
+        scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes, _ = top_k_rows(queries @ self.centroids.T, nprobe)
+        for row, (query, clusters) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([
+                self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in clusters
+            ])
+            if excluded is not None:
+                candidates = candidates[~excluded[candidates]]
+            if len(candidates) == 0:
+                continue
+            found, found_scores = top_k_rows((self.vectors[candidates] @ query)[None, :], top_k)
+            indices[row, :found.shape[1]] = candidates[found[0]]
+            scores[row, :found.shape[1]] = found_scores[0]
+        return indices, scores
+
+    def search(self, queries, top_k=10, exclude_title=None):
+        """Return (indices, scores) of the top_k stored vectors for each query row."""
+        queries = normalize(np.atleast_2d(queries))
+        excluded = self.titles == exclude_title if exclude_title is not None else None
+        if self.mode == "ann":
+            return self._search_ivf(queries, top_k, excluded)
+
+        scores = self._scores(queries)
+        if excluded is not None:
+            scores[:, excluded] = -np.inf
+        return top_k_rows(scores, top_k)
+
+    def query(self, input_embedding, top_k=10, namespace=None, movie_name=None):
+        """Drop-in replacement for utils.utils.query_embedding answered from memory."""
+        indices, scores = self.search(input_embedding, top_k=top_k, exclude_title=movie_name)
+        matches = [
+            search_match(self.ids[i], float(score), self.metadatas[i])
+            for i, score in zip(indices[0], scores[0])
+            if i >= 0 and np.isfinite(score)
+        ]
+        return search_response(matches)
+
+    def item_centroids(self):
+        """Collapse the per-review vectors into one centroid vector per item."""
+        keys = [m.get("item_id", m.get("title")) for m in self.metadatas]
+        group_of = {}
+        groups = np.array([group_of.setdefault(key, len(group_of)) for key in keys], dtype=np.int64)
+        # accumulate in chunks so quantized mode never rebuilds the full float matrix
+        dimension = self.dense_rows(slice(0, 1)).shape[1]
+        centroids = np.zeros((len(group_of), dimension), dtype=np.float32)
+        counts = np.zeros(len(group_of), dtype=np.int64)
+        for start in range(0, len(groups), CENTROID_CHUNK_ROWS):
+            end = start + CENTROID_CHUNK_ROWS
+            add_group_sums(centroids, counts, self.dense_rows(slice(start, end)), groups[start:end])
+        centroids /= np.maximum(counts, 1)[:, None]
+
+        first_row = {}
+        for row, group in enumerate(groups):
+            first_row.setdefault(int(group), row)
+        ids = [item_key(keys[first_row[g]]) for g in range(len(group_of))]
+        metadatas = [self.metadatas[first_row[g]] for g in range(len(group_of))]
+        return ids, centroids, metadatas
@@ -0,0 +1,96 @@
+"""
+Maximal marginal relevance (MMR) re-ranking of recommendation candidates.
+
+Each step picks the candidate that best trades off relevance to the query
+against similarity to the candidates already picked:
+    lambda_mult * relevance - (1 - lambda_mult) * max_similarity_to_selected
+lambda_mult=1 keeps the raw similarity order, lower values favour diversity.
+Candidates are compared through their precomputed item centroids (the mean of
+all review vectors of an item, see utils/build_item_centroids.py). The pairwise
+similarity matrix is computed once, so a selection step is a single vectorized
+update over the candidate set.
+"""
+
+import logging
+
+import numpy as np
+
+from utils.local_search import item_key, normalize
+
+logger = logging.getLogger(__name__)
+
+
+class item_centroid_table:
+    def __init__(self, ids, centroids):
+        self.row_of = {item_key(item_id): row for row, item_id in enumerate(ids)}
+        self.centroids = normalize(centroids)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table written by utils/build_item_centroids.py."""
+        with np.load(path) as data:
+            return cls(data["ids"].tolist(), data["centroids"])
+
+    def save(self, path):
+        ids = sorted(self.row_of, key=self.row_of.get)
+        np.savez(path, ids=np.array(ids), centroids=self.centroids)
+
+    def lookup(self, matches):
+        """Keep the best match of each title that has a centroid.
+
+        Returns (best_matches, centroids) in the order the matches were ranked.
+        """
+        seen, best_matches, rows, missing = set(), [], [], set()
+        for match in matches:
+            title = match.metadata.get("title")
+            if not title or title in seen:
+                continue
+            row = self.row_of.get(item_key(match.metadata.get("item_id")))
+            if row is None:
+                missing.add(title)
+                continue
+            seen.add(title)
+            best_matches.append(match)
+            rows.append(row)
+
+        missing -= seen
+        if missing:
+            # a stale centroid file or one built from another namespace
+            logger.warning(
+                "%d of %d candidate titles have no item centroid and were dropped; "
+                "rebuild with utils/build_item_centroids.py",
+                len(missing), len(seen) + len(missing),
+            )
+        return best_matches, self.centroids[rows]
+
+
+def check_lambda(lambda_mult):
+    if not 0 <= lambda_mult <= 1:
+        raise ValueError(f"mmr_lambda must be between 0 and 1, got {lambda_mult}")
+
+
+def mmr_rerank(relevance, vectors, top_k, lambda_mult=0.5):
+    """Return the indices of top_k candidates in MMR order."""
+    check_lambda(lambda_mult)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    top_k = min(top_k, len(relevance))
+    if top_k == 0:
+        return []
+
+    vectors = normalize(vectors)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    is_selected = np.zeros(len(relevance), dtype=bool)
+    is_selected[selected[0]] = True
+
+    for _ in range(top_k - 1):
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        mmr[is_selected] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        is_selected[best] = True
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
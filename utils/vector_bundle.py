@@ -0,0 +1,268 @@
+"""
+Binary export/import of the vector catalog for fast node bootstrap.
+
+A bundle holds every vector, id and metadata record of a Pinecone namespace, so
+a new serving node can be brought up without re-running the embedding API:
+- export: download the namespace from Pinecone and write a bundle
+- import: bulk-load a bundle into Pinecone
+- check: verify a bundle and print what it contains
+
+A serving node uses a bundle directly as its local search engine by setting
+VECTOR_BUNDLE_PATH (see movie_recommender).
+
+Bundle layout (little-endian):
+- 256-byte header: magic, format version, dimension, vector count, an
+  (offset, length) pair for each section and a SHA-256 of the whole file,
+  computed with the digest field zeroed
+- vectors: float32 matrix (count x dimension), 64-byte aligned
+- id offsets: uint64 table (count + 1) into the id data
+- id data: concatenated UTF-8 ids
+- metadata offsets: uint64 table (count + 1) into the metadata data
+- metadata data: concatenated UTF-8 JSON records
+- info: JSON with the namespace and export time
+
+The vectors section can be memory-mapped and used directly.
+
+Run from the repository root:
+    python -m utils.vector_bundle export data/vectors.bundle
+    python -m utils.vector_bundle import data/vectors.bundle
+    python -m utils.vector_bundle check data/vectors.bundle
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+
+from utils.local_search import fetch_namespace_vectors, local_index
+
+load_dotenv()
+
+MAGIC = b"MOVVEC\x00\x00"
+VERSION = 2
+SECTIONS = ("vectors", "id_offsets", "id_data", "meta_offsets", "meta_data", "info")
+HEADER = struct.Struct("<8sIIQ" + "QQ" * len(SECTIONS) + "32s")
+HEADER_SIZE = 256
+DIGEST_OFFSET = HEADER.size - 32
+ALIGNMENT = 64
+
+# vectors per Pinecone upsert request
+UPSERT_BATCH = 100
+
+
+def _offsets_table(blobs):
+    """uint64 start offsets of each blob plus the total length."""
+    return np.concatenate(([0], np.cumsum([len(b) for b in blobs]))).astype(np.uint64)
+
+
+def write_bundle(path, ids, vectors, metadatas, namespace=None):
+    """Write vectors, ids and metadata into a checksummed bundle file."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2 or len(vectors) != len(ids) or len(ids) != len(metadatas):
+        raise ValueError("ids, vectors and metadatas must describe the same number of records")
+
+    id_blobs = [str(i).encode("utf-8") for i in ids]
+    meta_blobs = [json.dumps(m, separators=(",", ":")).encode("utf-8") for m in metadatas]
+    info = {"namespace": namespace, "exported_at": datetime.now(timezone.utc).isoformat()}
+    payloads = {
+        "vectors": vectors.tobytes(),
+        "id_offsets": _offsets_table(id_blobs).tobytes(),
+        "id_data": b"".join(id_blobs),
+        "meta_offsets": _offsets_table(meta_blobs).tobytes(),
+        "meta_data": b"".join(meta_blobs),
+        "info": json.dumps(info).encode("utf-8"),
+    }
+
+    # lay the sections out first, aligned so the arrays can be viewed in place
+    table, chunks, position = [], [], HEADER_SIZE
+    for name in SECTIONS:
+        padding = -position % ALIGNMENT
+        chunks.extend((b"\x00" * padding, payloads[name]))
+        position += padding
+        table.extend((position, len(payloads[name])))
+        position += len(payloads[name])
+
+    fields = (MAGIC, VERSION, vectors.shape[1], len(ids), *table)
+    header = HEADER.pack(*fields, b"\x00" * 32).ljust(HEADER_SIZE, b"\x00")
+    checksum = hashlib.sha256(header)
+    for chunk in chunks:
+        checksum.update(chunk)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(*fields, checksum.digest()).ljust(HEADER_SIZE, b"\x00"))
+        for chunk in chunks:
+            f.write(chunk)
+
+
+class vector_bundle:
+    def __init__(self, path, verify=True):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._open(path, verify)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, path, verify):
+        if len(self._mmap) < HEADER_SIZE:
+            raise ValueError(f"{path} is too small to be a vector bundle")
+        magic, version, dimension, count, *table, digest = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a vector bundle")
+        if version != VERSION:
+            raise ValueError(f"Unsupported bundle version {version}, expected {VERSION}")
+        if verify:
+            header = bytearray(self._mmap[:HEADER_SIZE])
+            header[DIGEST_OFFSET:DIGEST_OFFSET + 32] = b"\x00" * 32
+            checksum = hashlib.sha256(header)
+            with memoryview(self._mmap) as view:
+                checksum.update(view[HEADER_SIZE:])
+            if checksum.digest() != digest:
+                raise ValueError(f"Checksum mismatch, {path} is corrupt or truncated")
+
+        self._sections = {name: (table[2 * i], table[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        for name, (offset, length) in self._sections.items():
+            if offset < HEADER_SIZE or offset + length > len(self._mmap):
+                raise ValueError(f"Section '{name}' of {path} lies outside the file")
+        expected = {
+            "vectors": count * dimension * 4,
+            "id_offsets": (count + 1) * 8,
+            "meta_offsets": (count + 1) * 8,
+        }
+        for name, length in expected.items():
+            if self._sections[name][1] != length:
+                raise ValueError(f"Section '{name}' of {path} is {self._sections[name][1]} bytes, expected {length}")
+        for name in ("id", "meta"):
+            # checked even without verify, a bad table would misread every record
+            # copied so no view of the map is alive if the file is closed on error
+            offsets = self._array(f"{name}_offsets", np.uint64).copy()
+            data_length = self._sections[f"{name}_data"][1]
+            if offsets[0] != 0 or offsets[-1] != data_length or np.any(offsets[1:] < offsets[:-1]):
+                raise ValueError(f"Section '{name}_offsets' of {path} does not index its {data_length}-byte data section")
+
+        self.path = path
+        self.dimension = dimension
+        self.count = count
+        self.vectors = self._array("vectors", np.float32).reshape(count, dimension)
+        self.info = json.loads(self._bytes("info"))
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map, arrays taken from .vectors must not outlive it."""
+        self.vectors = None
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def _array(self, name, dtype):
+        offset, length = self._sections[name]
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    def _bytes(self, name):
+        offset, length = self._sections[name]
+        return self._mmap[offset:offset + length]
+
+    def _strings(self, name):
+        offsets = self._array(f"{name}_offsets", np.uint64).tolist()
+        data = self._bytes(f"{name}_data")
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def ids(self):
+        return self._strings("id")
+
+    @property
+    def metadatas(self):
+        return [json.loads(record) for record in self._strings("meta")]
+
+
+def export_bundle(path, namespace):
+    """Download a Pinecone namespace and write it to a bundle."""
+    # imported here so loading a bundle locally needs no API keys
+    from utils.utils import index
+
+    print(f"Downloading vectors from namespace '{namespace}'...")
+    ids, vectors, metadatas = fetch_namespace_vectors(index, namespace)
+    print(f"✓ Loaded {len(ids)} vectors of dimension {vectors.shape[1]}")
+
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    write_bundle(path, ids, vectors, metadatas, namespace=namespace)
+    print(f"✓ Bundle saved to: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+def import_to_pinecone(bundle, namespace):
+    """Upsert every record of a bundle into a Pinecone namespace."""
+    from utils.utils import index
+
+    ids, metadatas = bundle.ids, bundle.metadatas
+    for start in range(0, len(ids), UPSERT_BATCH):
+        end = start + UPSERT_BATCH
+        values = bundle.vectors[start:end].tolist()
+        index.upsert(vectors=zip(ids[start:end], values, metadatas[start:end]), namespace=namespace)
+    print(f"✓ Upserted {len(ids)} vectors into namespace '{namespace}'")
+
+
+def load_local_index(path, mode="exact", verify=True):
+    """Build a local search index directly over a memory-mapped bundle."""
+    # not closed, the index keeps searching the mapped vectors
+    bundle = vector_bundle(path, verify=verify)
+    return local_index(bundle.ids, bundle.vectors, bundle.metadatas, mode=mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the vector catalog as a binary bundle.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write a Pinecone namespace to a bundle")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--namespace", default=os.getenv("NAMESPACE", "namespace_until_1990"))
+
+    import_parser = subparsers.add_parser("import", help="bulk-load a bundle into Pinecone")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--namespace", default=None, help="defaults to the namespace the bundle was exported from")
+    import_parser.add_argument("--no-verify", action="store_true", help="skip the checksum check")
+
+    check_parser = subparsers.add_parser("check", help="verify a bundle and print what it contains")
+    check_parser.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_bundle(args.path, args.namespace)
+        return
+
+    start = time.perf_counter()
+    if args.command == "import":
+        with vector_bundle(args.path, verify=not args.no_verify) as bundle:
+            namespace = args.namespace or bundle.info.get("namespace")
+            if not namespace:
+                raise ValueError(f"{args.path} records no namespace, pass one with --namespace")
+            import_to_pinecone(bundle, namespace)
+        print(f"✓ Import finished in {time.perf_counter() - start:.1f}s")
+    else:
+        with vector_bundle(args.path) as bundle:
+            print(f"✓ {args.path} is valid: {len(bundle)} vectors of dimension {bundle.dimension}, "
+                  f"exported from '{bundle.info.get('namespace')}' at {bundle.info.get('exported_at')}")
+        print(f"✓ Check finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()